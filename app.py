@@ -4,14 +4,20 @@
 import logging
 import sys
 from datetime import datetime
+from functools import lru_cache
+from itertools import groupby
 from logging import FileHandler, Formatter
+from operator import itemgetter
 
+import babel
 import babel.dates
-import dateutil.parser
+from enums import GENRE_ID_TO_NAME, GENRE_NAME_TO_ID
 from flask import Flask, flash, redirect, render_template, request, url_for
 from flask_migrate import Migrate
 from flask_moment import Moment
 from forms import ArtistForm, ShowForm, VenueForm
+from sqlalchemy import and_, event, exists, func, insert, select, update
+from sqlalchemy.orm import Session
 
 # ----------------------------------------------------------------------------#
 # App Config
@@ -24,17 +30,35 @@ from models import Artist, Show, Venue, db  # noqa: E0402
 db.init_app(app)
 migrate = Migrate(app, db)
 
+if app.debug:
+    # Dev-only N+1 detection: log every relationship lazy load issued inside a request.
+    @event.listens_for(Session, "do_orm_execute")
+    def warn_on_lazy_load(orm_execute_state):
+        if orm_execute_state.is_select and orm_execute_state.lazy_loaded_from is not None:
+            app.logger.warning(
+                "Lazy load of %s (possible N+1 query)", orm_execute_state.loader_strategy_path[-1]
+            )
+
 
 # ----------------------------------------------------------------------------#
 # Filters
 # ----------------------------------------------------------------------------#
+LOCALE = babel.Locale.parse("en")
+DATETIME_PATTERNS = {
+    "full": babel.dates.parse_pattern("EEEE MMMM, d, y 'at' h:mma"),
+    "medium": babel.dates.parse_pattern("EE MM, dd, y h:mma"),
+}
+
+
+@lru_cache(maxsize=4096)
+def _format_datetime(date, format):
+    format = DATETIME_PATTERNS.get(format, format)
+    return babel.dates.format_datetime(date, format, locale=LOCALE)
+
+
 def format_datetime(value, format="medium"):
-    date = dateutil.parser.parse(value)
-    if format == "full":
-        format = "EEEE MMMM, d, y 'at' h:mma"
-    elif format == "medium":
-        format = "EE MM, dd, y h:mma"
-    return babel.dates.format_datetime(date, format, locale="en")
+    date = value if isinstance(value, datetime) else datetime.fromisoformat(value)
+    return _format_datetime(date, format)
 
 
 app.jinja_env.filters["datetime"] = format_datetime
@@ -53,55 +77,55 @@ def index():
 # ----------------------------------------------------------------------------#
 @app.route("/venues")
 def venues():
-    venues = db.session.query(Venue).all()
-    areas = (
-        db.session.query(Venue)
-        .distinct(Venue.city, Venue.state)
-        .order_by(Venue.state, Venue.city)
+    rows = (
+        db.session.execute(
+            select(
+                Venue.city,
+                Venue.state,
+                Venue.id,
+                Venue.name,
+                func.count(Show.id)
+                .filter(Show.start_time > func.now())
+                .label("num_upcoming_shows"),
+            )
+            .outerjoin(Show, Show.venue_id == Venue.id)
+            .group_by(Venue.id)
+            .order_by(Venue.state, Venue.city, Venue.name)
+        )
+        .mappings()
         .all()
     )
-    data = []
-    for area in areas:
-        data.append(
-            {
-                "city": area.city,
-                "state": area.state,
-                "venues": [
-                    {
-                        "id": venue.id,
-                        "name": venue.name,
-                        "num_upcoming_shows": len(
-                            [show for show in venue.shows if show.start_time > datetime.now()]
-                        ),
-                    }
-                    for venue in venues
-                    if venue.city == area.city and venue.state == area.state
-                ],
-            }
-        )
+    data = [
+        {"city": city, "state": state, "venues": list(area_venues)}
+        for (city, state), area_venues in groupby(rows, key=itemgetter("city", "state"))
+    ]
     return render_template("pages/venues.html", areas=data)
 
 
 @app.route("/venues/search", methods=["POST"])
 def search_venues():
-    search_term = request.form.get("search_term", "")
-    results = db.session.query(Venue).filter(Venue.name.ilike(f"%{search_term}%")).all()
-    data = []
-    for result in results:
-        data.append(
-            {
-                "id": result.id,
-                "name": result.name,
-                "num_upcoming_shows": db.session.query(Show)
-                .filter(Show.venue_id == result.id, Show.start_time > datetime.now())
-                .count(),
-            }
-        )
+    search_term = request.form.get("search_term", "").strip()
+    pattern = f"%{search_term}%"
+    results = (
+        db.session.query(Venue.id, Venue.name, func.count(Show.id).label("num_upcoming_shows"))
+        .outerjoin(Show, and_(Show.venue_id == Venue.id, Show.start_time > func.now()))
+        .filter(Venue.name.ilike(pattern))
+        .group_by(Venue.id)
+        .all()
+    )
+    data = [
+        {
+            "id": result.id,
+            "name": result.name,
+            "num_upcoming_shows": result.num_upcoming_shows,
+        }
+        for result in results
+    ]
     response = {"count": len(results), "data": data}
     return render_template(
         "pages/search_venues.html",
         results=response,
-        search_term=request.form.get("search_term", ""),
+        search_term=search_term,
     )
 
 
@@ -111,25 +135,35 @@ def show_venue(venue_id):
     if not venue:
         return render_template("errors/404.html")
 
-    past_shows = []
-    upcoming_shows = []
-    for show in venue.shows:
-        temp_show = {
-            "artist_id": show.artist_id,
-            "artist_name": show.Artist.name,
-            "artist_image_link": show.Artist.image_link,
-            "start_time": show.start_time.strftime("%m/%d/%Y, %H:%M"),
-        }
-        if show.start_time <= datetime.now():
-            past_shows.append(temp_show)
-        else:
-            upcoming_shows.append(temp_show)
-
-    data = vars(venue)
-    data["past_shows"] = past_shows
-    data["upcoming_shows"] = upcoming_shows
-    data["past_shows_count"] = len(past_shows)
-    data["upcoming_shows_count"] = len(upcoming_shows)
+    shows_query = db.session.query(
+        Show.artist_id,
+        Artist.name.label("artist_name"),
+        Artist.image_link.label("artist_image_link"),
+        Show.start_time,
+    ).join(Artist, Show.artist_id == Artist.id)
+    past_shows = shows_query.filter(Show.venue_id == venue_id, Show.start_time <= func.now()).all()
+    upcoming_shows = shows_query.filter(
+        Show.venue_id == venue_id, Show.start_time > func.now()
+    ).all()
+
+    data = {
+        "id": venue.id,
+        "name": venue.name,
+        "genres": [GENRE_ID_TO_NAME[genre_id] for genre_id in venue.genres],
+        "address": venue.address,
+        "city": venue.city,
+        "state": venue.state,
+        "phone": venue.phone,
+        "website": venue.website,
+        "facebook_link": venue.facebook_link,
+        "seeking_talent": venue.seeking_talent,
+        "seeking_description": venue.seeking_description,
+        "image_link": venue.image_link,
+        "past_shows": past_shows,
+        "upcoming_shows": upcoming_shows,
+        "past_shows_count": len(past_shows),
+        "upcoming_shows_count": len(upcoming_shows),
+    }
 
     return render_template("pages/show_venue.html", venue=data)
 
@@ -154,7 +188,7 @@ def create_venue_submission():
                 state=form.state.data,
                 address=form.address.data,
                 phone=form.phone.data,
-                genres=form.genres.data,
+                genres=[GENRE_NAME_TO_ID[name] for name in form.genres.data],
                 facebook_link=form.facebook_link.data,
                 image_link=form.image_link.data,
                 website=form.website_link.data,
@@ -185,7 +219,11 @@ def create_venue_submission():
 def delete_venue(venue_id):
     error = False
     try:
-        db.session.get(Venue, venue_id).delete()
+        deleted = (
+            db.session.query(Venue).filter(Venue.id == venue_id).delete(synchronize_session=False)
+        )
+        if deleted == 0:
+            raise ValueError(f"Venue {venue_id} not found")
         db.session.commit()
     except Exception:
         db.session.rollback()
@@ -195,7 +233,7 @@ def delete_venue(venue_id):
         db.session.close()
     if error:
         flash(f"An error occurred.  Venue {venue_id} could not be deleted.")
-    if not error:
+    else:
         flash(f"Venue {venue_id} was successfully deleted.")
     # TODO: BONUS CHALLENGE: Implement a button to delete a Venue on a Venue Page, have it so that
     # clicking that button delete it from the db then redirect the user to the homepage
@@ -207,30 +245,34 @@ def delete_venue(venue_id):
 # ----------------------------------------------------------------------------#
 @app.route("/artists")
 def artists():
-    data = db.session.query(Artist).order_by(Artist.name).all()
+    data = db.session.execute(select(Artist.id, Artist.name).order_by(Artist.name)).mappings().all()
     return render_template("pages/artists.html", artists=data)
 
 
 @app.route("/artists/search", methods=["POST"])
 def search_artists():
-    search_term = request.form.get("search_term", "")
-    results = db.session.query(Artist).filter(Artist.name.ilike(f"%{search_term}%")).all()
-    data = []
-    for result in results:
-        data.append(
-            {
-                "id": result.id,
-                "name": result.name,
-                "num_upcoming_shows": db.session.query(Show)
-                .filter(Show.venue_id == result.id, Show.start_time > datetime.now())
-                .count(),
-            }
-        )
+    search_term = request.form.get("search_term", "").strip()
+    pattern = f"%{search_term}%"
+    results = (
+        db.session.query(Artist.id, Artist.name, func.count(Show.id).label("num_upcoming_shows"))
+        .outerjoin(Show, and_(Show.artist_id == Artist.id, Show.start_time > func.now()))
+        .filter(Artist.name.ilike(pattern))
+        .group_by(Artist.id)
+        .all()
+    )
+    data = [
+        {
+            "id": result.id,
+            "name": result.name,
+            "num_upcoming_shows": result.num_upcoming_shows,
+        }
+        for result in results
+    ]
     response = {"count": len(results), "data": data}
     return render_template(
         "pages/search_artists.html",
         results=response,
-        search_term=request.form.get("search_term", ""),
+        search_term=search_term,
     )
 
 
@@ -240,25 +282,36 @@ def show_artist(artist_id):
     if not artist:
         return render_template("errors/404.html")
 
-    past_shows = []
-    upcoming_shows = []
-    for show in artist.shows:
-        temp_show = {
-            "venue_id": show.venue_id,
-            "venue_name": show.Venue.name,
-            "venue_image_link": show.Venue.image_link,
-            "start_time": show.start_time.strftime("%m/%d/%Y, %H:%M"),
-        }
-        if show.start_time <= datetime.now():
-            past_shows.append(temp_show)
-        else:
-            upcoming_shows.append(temp_show)
-
-    data = vars(artist)
-    data["past_shows"] = past_shows
-    data["upcoming_shows"] = upcoming_shows
-    data["past_shows_count"] = len(past_shows)
-    data["upcoming_shows_count"] = len(upcoming_shows)
+    shows_query = db.session.query(
+        Show.venue_id,
+        Venue.name.label("venue_name"),
+        Venue.image_link.label("venue_image_link"),
+        Show.start_time,
+    ).join(Venue, Show.venue_id == Venue.id)
+    past_shows = shows_query.filter(
+        Show.artist_id == artist_id, Show.start_time <= func.now()
+    ).all()
+    upcoming_shows = shows_query.filter(
+        Show.artist_id == artist_id, Show.start_time > func.now()
+    ).all()
+
+    data = {
+        "id": artist.id,
+        "name": artist.name,
+        "genres": [GENRE_ID_TO_NAME[genre_id] for genre_id in artist.genres],
+        "city": artist.city,
+        "state": artist.state,
+        "phone": artist.phone,
+        "website": artist.website,
+        "facebook_link": artist.facebook_link,
+        "seeking_venue": artist.seeking_venue,
+        "seeking_description": artist.seeking_description,
+        "image_link": artist.image_link,
+        "past_shows": past_shows,
+        "upcoming_shows": upcoming_shows,
+        "past_shows_count": len(past_shows),
+        "upcoming_shows_count": len(upcoming_shows),
+    }
 
     return render_template("pages/show_artist.html", artist=data)
 
@@ -272,7 +325,7 @@ def edit_artist(artist_id):
     artist = db.session.get(Artist, artist_id)
     if artist is not None:
         form.name.data = artist.name
-        form.genres.data = artist.genres
+        form.genres.data = [GENRE_ID_TO_NAME[genre_id] for genre_id in artist.genres]
         form.city.data = artist.city
         form.state.data = artist.state
         form.phone.data = artist.phone
@@ -287,18 +340,22 @@ def edit_artist(artist_id):
 @app.route("/artists/<int:artist_id>/edit", methods=["POST"])
 def edit_artist_submission(artist_id):
     error = False
-    artist = db.session.get(Artist, artist_id)
     try:
-        artist.name = request.form["name"]
-        artist.genres = request.form.getlist("genres")
-        artist.city = request.form["city"]
-        artist.state = request.form["state"]
-        artist.phone = request.form["phone"]
-        artist.website = request.form["website_link"]
-        artist.facebook_link = request.form["facebook_link"]
-        artist.seeking_venue = True if "seeking_venue" in request.form else False
-        artist.seeking_description = request.form["seeking_description"]
-        artist.image_link = request.form["image_link"]
+        payload = {
+            Artist.name: request.form["name"],
+            Artist.genres: [GENRE_NAME_TO_ID[name] for name in request.form.getlist("genres")],
+            Artist.city: request.form["city"],
+            Artist.state: request.form["state"],
+            Artist.phone: request.form["phone"],
+            Artist.website: request.form["website_link"],
+            Artist.facebook_link: request.form["facebook_link"],
+            Artist.seeking_venue: "seeking_venue" in request.form,
+            Artist.seeking_description: request.form["seeking_description"],
+            Artist.image_link: request.form["image_link"],
+        }
+        result = db.session.execute(update(Artist).where(Artist.id == artist_id).values(payload))
+        if result.rowcount == 0:
+            raise ValueError(f"Artist {artist_id} not found")
         db.session.commit()
     except Exception:
         db.session.rollback()
@@ -308,7 +365,7 @@ def edit_artist_submission(artist_id):
         db.session.close()
     if error:
         flash("An error occurred.  Artist could not be changed.")
-    if not error:
+    else:
         flash("Artist was successfully updated!")
     return redirect(url_for("show_artist", artist_id=artist_id))
 
@@ -319,7 +376,7 @@ def edit_venue(venue_id):
     venue = db.session.get(Venue, venue_id)
     if venue is not None:
         form.name.data = venue.name
-        form.genres.data = venue.genres
+        form.genres.data = [GENRE_ID_TO_NAME[genre_id] for genre_id in venue.genres]
         form.address.data = venue.address
         form.city.data = venue.city
         form.state.data = venue.state
@@ -335,19 +392,23 @@ def edit_venue(venue_id):
 @app.route("/venues/<int:venue_id>/edit", methods=["POST"])
 def edit_venue_submission(venue_id):
     error = False
-    venue = db.session.get(Venue, venue_id)
     try:
-        venue.name = request.form["name"]
-        venue.genres = request.form.getlist("genres")
-        venue.address = request.form["address"]
-        venue.city = request.form["city"]
-        venue.state = request.form["state"]
-        venue.phone = request.form["phone"]
-        venue.website = request.form["website_link"]
-        venue.facebook_link = request.form["facebook_link"]
-        venue.seeking_talent = True if "seeking_talent" in request.form else False
-        venue.seeking_description = request.form["seeking_description"]
-        venue.image_link = request.form["image_link"]
+        payload = {
+            Venue.name: request.form["name"],
+            Venue.genres: [GENRE_NAME_TO_ID[name] for name in request.form.getlist("genres")],
+            Venue.address: request.form["address"],
+            Venue.city: request.form["city"],
+            Venue.state: request.form["state"],
+            Venue.phone: request.form["phone"],
+            Venue.website: request.form["website_link"],
+            Venue.facebook_link: request.form["facebook_link"],
+            Venue.seeking_talent: "seeking_talent" in request.form,
+            Venue.seeking_description: request.form["seeking_description"],
+            Venue.image_link: request.form["image_link"],
+        }
+        result = db.session.execute(update(Venue).where(Venue.id == venue_id).values(payload))
+        if result.rowcount == 0:
+            raise ValueError(f"Venue {venue_id} not found")
         db.session.commit()
     except Exception:
         db.session.rollback()
@@ -357,7 +418,7 @@ def edit_venue_submission(venue_id):
         db.session.close()
     if error:
         flash("An error occurred.  Venue could not be changed.")
-    if not error:
+    else:
         flash("Venue was successfully updated!")
     return redirect(url_for("show_venue", venue_id=venue_id))
 
@@ -381,7 +442,7 @@ def create_artist_submission():
                 city=form.city.data,
                 state=form.state.data,
                 phone=form.phone.data,
-                genres=form.genres.data,
+                genres=[GENRE_NAME_TO_ID[name] for name in form.genres.data],
                 facebook_link=form.facebook_link.data,
                 image_link=form.image_link.data,
                 website=form.website_link.data,
@@ -413,19 +474,22 @@ def create_artist_submission():
 # ----------------------------------------------------------------------------#
 @app.route("/shows")
 def shows():
-    shows_query = db.session.query(Show, Venue, Artist).join(Venue).join(Artist).all()
-    data = []
-    for show, venue, artist in shows_query:
-        data.append(
-            {
-                "venue_id": show.venue_id,
-                "venue_name": venue.name,
-                "artist_id": show.artist_id,
-                "artist_name": artist.name,
-                "artist_image_link": artist.image_link,
-                "start_time": show.start_time.strftime("%m/%d/%Y, %H:%M"),
-            }
+    data = (
+        db.session.execute(
+            select(
+                Show.venue_id,
+                Venue.name.label("venue_name"),
+                Show.artist_id,
+                Artist.name.label("artist_name"),
+                Artist.image_link.label("artist_image_link"),
+                Show.start_time,
+            )
+            .join(Venue, Show.venue_id == Venue.id)
+            .join(Artist, Show.artist_id == Artist.id)
         )
+        .mappings()
+        .all()
+    )
     return render_template("pages/shows.html", shows=data)
 
 
@@ -440,21 +504,34 @@ def create_shows():
 def create_show_submission():
     form = ShowForm(request.form, meta={"csrf": False})
     if form.validate():
+        error = False
         try:
-            show = Show(
-                artist_id=form.artist_id.data,
-                venue_id=form.venue_id.data,
-                start_time=form.start_time.data,
+            artist_exists, venue_exists = db.session.execute(
+                select(
+                    exists().where(Artist.id == form.artist_id.data),
+                    exists().where(Venue.id == form.venue_id.data),
+                )
+            ).one()
+            if not artist_exists or not venue_exists:
+                raise ValueError("Artist or venue does not exist.")
+            db.session.execute(
+                insert(Show).values(
+                    artist_id=form.artist_id.data,
+                    venue_id=form.venue_id.data,
+                    start_time=form.start_time.data,
+                )
             )
-            db.session.add(show)
             db.session.commit()
-        except ValueError as e:
-            print(e)
+        except Exception:
             db.session.rollback()
+            error = True
+            print(sys.exc_info())
         finally:
             db.session.close()
-        # on successful db insert, flash success
-        flash("Show was successfully listed!")
+        if error:
+            flash("An error occurred.  Show could not be listed.")
+        else:
+            flash("Show was successfully listed!")
         return render_template("pages/home.html")
     else:
         message = []
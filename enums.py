@@ -28,6 +28,33 @@ class Genre(enum.Enum):
         return [(choice.name, choice.value) for choice in cls]
 
 
+# Fixed ids persisted in Venue.genres / Artist.genres and the "Genre" table.
+# Never renumber an existing entry; give new genres the next unused id.
+GENRE_ID_TO_NAME = {
+    1: Genre.Alternative.name,
+    2: Genre.Blues.name,
+    3: Genre.Classical.name,
+    4: Genre.Country.name,
+    5: Genre.Electronic.name,
+    6: Genre.Folk.name,
+    7: Genre.Funk.name,
+    8: Genre.Hip_Hop.name,
+    9: Genre.Heavy_Metal.name,
+    10: Genre.Instrumental.name,
+    11: Genre.Jazz.name,
+    12: Genre.Musical_Theatre.name,
+    13: Genre.Pop.name,
+    14: Genre.Punk.name,
+    15: Genre.R_n_B.name,
+    16: Genre.Reggae.name,
+    17: Genre.Rock_n_Roll.name,
+    18: Genre.Soul.name,
+    19: Genre.Swing.name,
+    20: Genre.Other.name,
+}
+GENRE_NAME_TO_ID = {name: genre_id for genre_id, name in GENRE_ID_TO_NAME.items()}
+
+
 class State(enum.Enum):
     AL = "AL"
     AK = "AK"
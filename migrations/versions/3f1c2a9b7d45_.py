@@ -0,0 +1,44 @@
+"""add trigram indexes on venue and artist names
+
+Revision ID: 3f1c2a9b7d45
+Revises: 8e3d15e4e38d
+Create Date: 2026-10-15 09:12:31.402118
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "3f1c2a9b7d45"
+down_revision = "8e3d15e4e38d"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "venue_name_trgm_idx",
+            "Venue",
+            ["name"],
+            unique=False,
+            postgresql_using="gin",
+            postgresql_ops={"name": "gin_trgm_ops"},
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            "artist_name_trgm_idx",
+            "Artist",
+            ["name"],
+            unique=False,
+            postgresql_using="gin",
+            postgresql_ops={"name": "gin_trgm_ops"},
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index("artist_name_trgm_idx", table_name="Artist", postgresql_concurrently=True)
+        op.drop_index("venue_name_trgm_idx", table_name="Venue", postgresql_concurrently=True)
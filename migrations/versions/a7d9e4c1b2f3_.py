@@ -0,0 +1,42 @@
+"""cascade show deletes and index show foreign keys
+
+Revision ID: a7d9e4c1b2f3
+Revises: 3f1c2a9b7d45
+Create Date: 2026-10-15 10:04:57.118345
+
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "a7d9e4c1b2f3"
+down_revision = "3f1c2a9b7d45"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.drop_constraint("Show_venue_id_fkey", "Show", type_="foreignkey")
+    op.drop_constraint("Show_artist_id_fkey", "Show", type_="foreignkey")
+    op.create_foreign_key(
+        "Show_venue_id_fkey", "Show", "Venue", ["venue_id"], ["id"], ondelete="CASCADE"
+    )
+    op.create_foreign_key(
+        "Show_artist_id_fkey",
+        "Show",
+        "Artist",
+        ["artist_id"],
+        ["id"],
+        ondelete="CASCADE",
+    )
+    op.create_index("show_venue_id_idx", "Show", ["venue_id"], unique=False)
+    op.create_index("show_artist_id_idx", "Show", ["artist_id"], unique=False)
+
+
+def downgrade():
+    op.drop_index("show_artist_id_idx", table_name="Show")
+    op.drop_index("show_venue_id_idx", table_name="Show")
+    op.drop_constraint("Show_artist_id_fkey", "Show", type_="foreignkey")
+    op.drop_constraint("Show_venue_id_fkey", "Show", type_="foreignkey")
+    op.create_foreign_key("Show_venue_id_fkey", "Show", "Venue", ["venue_id"], ["id"])
+    op.create_foreign_key("Show_artist_id_fkey", "Show", "Artist", ["artist_id"], ["id"])
@@ -0,0 +1,30 @@
+"""index show foreign keys together with start_time
+
+Revision ID: c5b8f0e2d6a1
+Revises: a7d9e4c1b2f3
+Create Date: 2026-10-15 10:41:09.573280
+
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "c5b8f0e2d6a1"
+down_revision = "a7d9e4c1b2f3"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index("show_venue_start_idx", "Show", ["venue_id", "start_time"], unique=False)
+    op.create_index("show_artist_start_idx", "Show", ["artist_id", "start_time"], unique=False)
+    # the composite indexes cover lookups on the leading foreign key column
+    op.drop_index("show_venue_id_idx", table_name="Show")
+    op.drop_index("show_artist_id_idx", table_name="Show")
+
+
+def downgrade():
+    op.create_index("show_artist_id_idx", "Show", ["artist_id"], unique=False)
+    op.create_index("show_venue_id_idx", "Show", ["venue_id"], unique=False)
+    op.drop_index("show_artist_start_idx", table_name="Show")
+    op.drop_index("show_venue_start_idx", table_name="Show")
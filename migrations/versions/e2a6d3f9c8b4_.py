@@ -0,0 +1,88 @@
+"""store genres as smallint ids referencing a Genre lookup table
+
+Revision ID: e2a6d3f9c8b4
+Revises: c5b8f0e2d6a1
+Create Date: 2026-10-15 11:27:44.860193
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "e2a6d3f9c8b4"
+down_revision = "c5b8f0e2d6a1"
+branch_labels = None
+depends_on = None
+
+# Frozen copy of enums.GENRE_ID_TO_NAME at the time of this revision.
+GENRES = [
+    (1, "Alternative"),
+    (2, "Blues"),
+    (3, "Classical"),
+    (4, "Country"),
+    (5, "Electronic"),
+    (6, "Folk"),
+    (7, "Funk"),
+    (8, "Hip_Hop"),
+    (9, "Heavy_Metal"),
+    (10, "Instrumental"),
+    (11, "Jazz"),
+    (12, "Musical_Theatre"),
+    (13, "Pop"),
+    (14, "Punk"),
+    (15, "R_n_B"),
+    (16, "Reggae"),
+    (17, "Rock_n_Roll"),
+    (18, "Soul"),
+    (19, "Swing"),
+    (20, "Other"),
+]
+
+
+def upgrade():
+    genre_table = op.create_table(
+        "Genre",
+        sa.Column("id", sa.SmallInteger(), autoincrement=False, nullable=False),
+        sa.Column("name", sa.String(length=120), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("name"),
+    )
+    op.bulk_insert(genre_table, [{"id": genre_id, "name": name} for genre_id, name in GENRES])
+
+    for table in ("Venue", "Artist"):
+        op.add_column(table, sa.Column("genre_ids", sa.ARRAY(sa.SmallInteger()), nullable=True))
+        # names without a matching Genre row are dropped
+        op.execute(f"""
+            UPDATE "{table}" SET genre_ids = ARRAY(
+                SELECT g.id
+                FROM unnest("{table}".genres) WITH ORDINALITY AS u(name, ord)
+                JOIN "Genre" g ON g.name = u.name
+                ORDER BY u.ord
+            )
+            """)
+        op.drop_column(table, "genres")
+        op.alter_column(table, "genre_ids", new_column_name="genres", nullable=False)
+        op.create_index(
+            f"{table.lower()}_genres_idx", table, ["genres"], unique=False, postgresql_using="gin"
+        )
+
+
+def downgrade():
+    for table in ("Artist", "Venue"):
+        op.drop_index(f"{table.lower()}_genres_idx", table_name=table)
+        op.add_column(
+            table, sa.Column("genre_names", sa.ARRAY(sa.String(length=120)), nullable=True)
+        )
+        op.execute(f"""
+            UPDATE "{table}" SET genre_names = ARRAY(
+                SELECT g.name
+                FROM unnest("{table}".genres) WITH ORDINALITY AS u(id, ord)
+                JOIN "Genre" g ON g.id = u.id
+                ORDER BY u.ord
+            )
+            """)
+        op.drop_column(table, "genres")
+        op.alter_column(table, "genre_names", new_column_name="genres", nullable=False)
+
+    op.drop_table("Genre")
@@ -6,12 +6,31 @@ from flask_sqlalchemy import SQLAlchemy
 db = SQLAlchemy()
 
 
+class Genre(db.Model):
+    __tablename__ = "Genre"
+
+    id = db.Column(db.SmallInteger, primary_key=True, autoincrement=False)
+    name = db.Column(db.String(120), nullable=False, unique=True)
+
+    def __repr__(self):
+        return f"<Genre ID: {self.id}, Genre Name: {self.name}>"
+
+
 class Venue(db.Model):
     __tablename__ = "Venue"
+    __table_args__ = (
+        db.Index(
+            "venue_name_trgm_idx",
+            "name",
+            postgresql_using="gin",
+            postgresql_ops={"name": "gin_trgm_ops"},
+        ),
+        db.Index("venue_genres_idx", "genres", postgresql_using="gin"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(120), nullable=False)
-    genres = db.Column(db.ARRAY(db.String(120)), nullable=False, default=[])
+    genres = db.Column(db.ARRAY(db.SmallInteger), nullable=False, default=[])
     address = db.Column(db.String(120))
     city = db.Column(db.String(120), nullable=False)
     state = db.Column(db.String(120), nullable=False)
@@ -21,7 +40,9 @@ class Venue(db.Model):
     seeking_talent = db.Column(db.Boolean(), default=False)
     seeking_description = db.Column(db.String(500))
     image_link = db.Column(db.String(500))
-    shows = db.relationship("Show", backref="Venue", lazy="joined", cascade="all, delete")
+    shows = db.relationship(
+        "Show", backref="Venue", lazy="select", cascade="all, delete", passive_deletes=True
+    )
 
     def __repr__(self):
         return f"<Venue ID: {self.id}, Venue Name: {self.name}>"
@@ -29,10 +50,19 @@ class Venue(db.Model):
 
 class Artist(db.Model):
     __tablename__ = "Artist"
+    __table_args__ = (
+        db.Index(
+            "artist_name_trgm_idx",
+            "name",
+            postgresql_using="gin",
+            postgresql_ops={"name": "gin_trgm_ops"},
+        ),
+        db.Index("artist_genres_idx", "genres", postgresql_using="gin"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(120), nullable=False)
-    genres = db.Column(db.ARRAY(db.String(120)), nullable=False, default=[])
+    genres = db.Column(db.ARRAY(db.SmallInteger), nullable=False, default=[])
     city = db.Column(db.String(120), nullable=False)
     state = db.Column(db.String(120), nullable=False)
     phone = db.Column(db.String(120))
@@ -41,7 +71,9 @@ class Artist(db.Model):
     seeking_venue = db.Column(db.Boolean(), default=False)
     seeking_description = db.Column(db.String(500))
     image_link = db.Column(db.String(500))
-    shows = db.relationship("Show", backref="Artist", lazy="joined", cascade="all, delete")
+    shows = db.relationship(
+        "Show", backref="Artist", lazy="select", cascade="all, delete", passive_deletes=True
+    )
 
     def __repr__(self):
         return f"<Artist ID: {self.id}, Artist Name: {self.name}>"
@@ -49,10 +81,16 @@ class Artist(db.Model):
 
 class Show(db.Model):
     __tablename__ = "Show"
+    __table_args__ = (
+        db.Index("show_venue_start_idx", "venue_id", "start_time"),
+        db.Index("show_artist_start_idx", "artist_id", "start_time"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
-    venue_id = db.Column(db.Integer, db.ForeignKey("Venue.id"), nullable=False)
-    artist_id = db.Column(db.Integer, db.ForeignKey("Artist.id"), nullable=False)
+    venue_id = db.Column(db.Integer, db.ForeignKey("Venue.id", ondelete="CASCADE"), nullable=False)
+    artist_id = db.Column(
+        db.Integer, db.ForeignKey("Artist.id", ondelete="CASCADE"), nullable=False
+    )
     start_time = db.Column(db.DateTime, nullable=False)
 
     def __repr__(self):